@@ -1,9 +1,9 @@
 from google import genai
+import os
+from dotenv import load_dotenv
 
 API_KEY = 'API_key'
 
-print("started backend.py file!")
-
 def get_file_contents(filename):
     try:
         with open(filename, 'r') as f:
@@ -13,14 +13,18 @@ def get_file_contents(filename):
     except FileNotFoundError:
         print("'%s' file not found" % filename)
 
-print("created get_file_contents function")
-
-api_key = get_file_contents(API_KEY)
+def get_api_key():
+    """Read the Gemini API key from the environment (.env included), falling back to the API_key file."""
+    load_dotenv()
+    return os.getenv("GEMINI_API_KEY") or get_file_contents(API_KEY)
 
-print("Your API_key is: ", api_key)
+def explain_ai():
+    """Ask Gemini a sample question; only runs when this file is executed directly."""
+    client = genai.Client(api_key = get_api_key())
+    response = client.models.generate_content(
+        model="gemini-2.0-flash", contents="Explain how AI works"
+    )
+    print(response.text)
 
-client = genai.Client(apikey = api_key)
-response = client.models.generate_content(
-    model="gemini-2.0-flash", contents="Explain how AI works"
-)
-print(response.text)
\ No newline at end of file
+if __name__ == '__main__':
+    explain_ai()
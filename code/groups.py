@@ -1,18 +1,83 @@
 from settings import *
+from collections import defaultdict
 
 class AllSprites(pygame.sprite.Group):
     def __init__(self):
         super().__init__()
         self.display_surface = pygame.display.get_surface()
         self.offset = pygame.Vector2()
+        self.camera_rect = pygame.Rect(0, 0, WINDOW_WIDTH, WINDOW_HEIGHT)
+        self.ground_surf = None # pre-rendered ground layer
     
     def draw(self, target_pos):
         self.offset.x = WINDOW_WIDTH // 2 - target_pos[0]
         self.offset.y = WINDOW_HEIGHT // 2 - target_pos[1]
-        
-        ground_sprites = [sprite for sprite in self if hasattr(sprite, 'ground')]
-        object_sprites = [sprite for sprite in self if not hasattr(sprite, 'ground')]
+        self.camera_rect.topleft = (-self.offset.x, -self.offset.y)
 
-        for layer in [ground_sprites, object_sprites]:
-            for sprite in sorted(layer, key = lambda sprite: sprite.rect.centery):
-                self.display_surface.blit(sprite.image, sprite.rect.topleft + self.offset)
\ No newline at end of file
+        if self.ground_surf:
+            self.display_surface.blit(self.ground_surf, self.offset)
+
+        # only sprites overlapping the camera get sorted and blitted
+        sprites = self.sprites()
+        visible_sprites = [sprites[i] for i in self.camera_rect.collidelistall([sprite.rect for sprite in sprites])]
+
+        # one batched blits call instead of a Python-level blit per sprite
+        blit_sequence = [(sprite.image, sprite.rect.topleft + self.offset)
+                         for sprite in sorted(visible_sprites, key = lambda sprite: sprite.rect.centery)]
+        self.display_surface.blits(blit_sequence, doreturn = False)
+
+
+class SpatialGroup(pygame.sprite.Group):
+    """Sprite group that also buckets its sprites into a uniform grid by rect center."""
+    def __init__(self, *sprites, cell_size = TILE_SIZE * 2):
+        super().__init__(*sprites)
+        self.cell_size = cell_size
+        self.cells = defaultdict(set)
+        self.sprite_cells = {}
+        self.sprite_list = None # cached sprites() tuple, rebuilt only when membership changes
+
+    def get_cell(self, pos):
+        return int(pos[0]) // self.cell_size, int(pos[1]) // self.cell_size
+
+    def sprites(self):
+        # a tuple, so the cache shared between callers can't be mutated
+        if self.sprite_list is None:
+            self.sprite_list = tuple(self.spritedict)
+        return self.sprite_list
+
+    def add_internal(self, sprite, layer = None):
+        super().add_internal(sprite, layer)
+        self.sprite_list = None
+
+    def remove_internal(self, sprite):
+        super().remove_internal(sprite)
+        self.sprite_list = None
+        cell = self.sprite_cells.pop(sprite, None)
+        if cell is not None:
+            self.discard_from_cell(sprite, cell)
+
+    def discard_from_cell(self, sprite, cell):
+        bucket = self.cells[cell]
+        bucket.discard(sprite)
+        if not bucket:
+            del self.cells[cell]
+
+    def rehash(self):
+        # sprites are hashed lazily since their rect does not exist yet when they join the group;
+        # a sprite is only re-bucketed when its cell changed
+        for sprite in self.sprites():
+            cell = self.get_cell(sprite.rect.center)
+            old_cell = self.sprite_cells.get(sprite)
+            if cell != old_cell:
+                if old_cell is not None:
+                    self.discard_from_cell(sprite, old_cell)
+                self.cells[cell].add(sprite)
+                self.sprite_cells[sprite] = cell
+
+    def nearby(self, rect):
+        """Yield the sprites hashed into the cells covering rect plus one neighbouring ring."""
+        left, top = self.get_cell(rect.topleft)
+        right, bottom = self.get_cell(rect.bottomright)
+        for cell_x in range(left - 1, right + 2):
+            for cell_y in range(top - 1, bottom + 2):
+                yield from self.cells.get((cell_x, cell_y), ())
@@ -1,18 +1,40 @@
-import threading  # Add threading for asynchronous API calls
+import threading
+import queue
+from concurrent.futures import ThreadPoolExecutor  # persistent worker pool for asynchronous API calls
+from collections import OrderedDict, deque
+from itertools import cycle
 
 # import backend
 from settings import *
 from player import Player
 from sprites import *
 from pytmx.util_pygame import load_pygame
-from groups import AllSprites
+from groups import AllSprites, SpatialGroup
 
 from random import randint, choice
+from math import ceil
+import numpy as np
 
 from google import genai
 import os
 from dotenv import load_dotenv
 import json  
+try:
+    from orjson import loads as json_loads  # faster parser when available; its errors subclass json.JSONDecodeError
+except ImportError:
+    from json import loads as json_loads
+
+# Gemini request pieces that don't change between enemy-move calls
+ENEMY_MOVES_PROMPT = (
+    "Given the following data:\n"
+    "Enemy positions: {enemy_positions}\n"
+    "Player position: {player_position}\n"
+    "Map layout (one row of {tile_size}px tiles per line, 1 = obstacle, top-left tile at {map_origin}):\n"
+    "{map_rows}\n"
+    "Calculate the next {num_moves} optimal positions for the enemies to navigate toward the player while avoiding obstacles. "
+    "Return the result as a JSON list with one list per enemy, in the order given, holding that enemy's next {num_moves} [x, y] positions."
+)
+ENEMY_MOVES_CONFIG = {"response_mime_type": "application/json"}  # ask for raw JSON without markdown fences
 
 class Game:
     def __init__(self):
@@ -29,13 +51,14 @@ class Game:
         self.gemini_api_key = os.getenv("GEMINI_API_KEY")
         if not self.gemini_api_key:
             raise ValueError("GEMINI_API_KEY environment variable not set.")
+        self.gemini_client = genai.Client(api_key=self.gemini_api_key)
         
 
         # groups
         self.all_sprites = AllSprites()
         self.collision_sprites = pygame.sprite.Group()
         self.bullet_sprites = pygame.sprite.Group()
-        self.enemy_sprites = pygame.sprite.Group()
+        self.enemy_sprites = SpatialGroup()
 
         # gun timer
         self.can_shoot = True
@@ -48,6 +71,14 @@ class Game:
         self.spawn_positions = []
 
         # audio
+        # round-robin channel pools for the frequent effects, so playing them skips the free channel scan
+        # while sounds still overlap; the extra channels keep the unreserved pool at its original size,
+        # and everything is reserved before the music starts so it can't land on one of them
+        shoot_pool, impact_pool = 2, 6 # shoot.wav ~0.18 s at a 100 ms cooldown, impact.ogg ~0.81 s
+        pygame.mixer.set_num_channels(pygame.mixer.get_num_channels() + shoot_pool + impact_pool)
+        pygame.mixer.set_reserved(shoot_pool + impact_pool)
+        self.shoot_channels = cycle([pygame.mixer.Channel(i) for i in range(shoot_pool)])
+        self.impact_channels = cycle([pygame.mixer.Channel(i) for i in range(shoot_pool, shoot_pool + impact_pool)])
         self.shoot_sound = pygame.mixer.Sound(join('audio', 'shoot.wav'))
         self.shoot_sound.set_volume(0.4)
         self.impact_sound = pygame.mixer.Sound(join('audio', 'impact.ogg'))
@@ -55,124 +86,150 @@ class Game:
         self.music.set_volume(0.3)
         self.music.play(loops = -1)
 
+        # map
+        self.tmx_map = load_pygame(join('data', 'maps', 'world.tmx'))
+        self.map_grid = self.build_map_grid()
+        self.map_dimensions = (self.tmx_map.width * TILE_SIZE, self.tmx_map.height * TILE_SIZE)
+
         # setup
         self.load_images()
         self.setup()
-        self.enemy_moves = []  # Initialize precomputed moves for enemies
+        # Precomputed moves for enemies as an (enemies, moves, 2) array, consumed one step per frame
+        self.enemy_moves = np.empty((0, 0, 2), dtype=np.int32)
+        self.enemy_move_step = 0
+
+        # Gemini move cache, keyed by coarse player/enemy cells
+        self.move_cache = OrderedDict()
+        self.move_cache_size = 64
+        self.move_cache_cell = TILE_SIZE * 8
+        self.pending_move_keys = set()
+        self.pending_moves = queue.Queue() # finished fetches, applied on the main thread
+
+        # failed fetches back off exponentially; fallback moves fill the gap until the deadline
+        self.api_failures = 0
+        self.api_retry_at = 0
+        self.api_max_backoff = 8000 # milliseconds
+
+        # sliding one-minute window of API call times, to stay under Gemini's per-minute limit
+        self.api_call_timestamps = deque()
+        self.api_calls_per_minute = 15
+
+        # background API work shares one pool instead of a new thread per request
+        self.api_pool = ThreadPoolExecutor(max_workers=2)
+        self.stop_event = threading.Event() # tells workers the game is shutting down
 
         
         
     def load_images(self):
         self.bullet_surf =  pygame.image.load(join('images', 'gun', 'bullet.png')).convert_alpha()
+        self.bullet_mask = pygame.mask.from_surface(self.bullet_surf)
 
-        folders = list(walk(join('images', 'enemies')))[0][1]
         self.enemy_frames = {}
-        for folder in folders:
-            for folder_path, _, file_names in walk(join('images', 'enemies', folder)):
-                self.enemy_frames[folder] = []
-                for file_name in sorted(file_names, key= lambda name: int(name.split('.')[0])):
-                    full_path = join(folder_path, file_name)
-                    surf = pygame.image.load(full_path).convert_alpha()
-                    self.enemy_frames[folder].append(surf)
+        with scandir(join('images', 'enemies')) as folders:
+            for folder in folders:
+                if folder.is_dir():
+                    with scandir(folder.path) as files:
+                        files = sorted(files, key= lambda file: int(file.name.split('.', 1)[0]))
+                    self.enemy_frames[folder.name] = [pygame.image.load(file.path).convert_alpha() for file in files]
+        # (frames, masks) per enemy type, so collide_mask never builds masks at runtime
+        self.enemy_animations = tuple((frames, [pygame.mask.from_surface(frame) for frame in frames])
+                                      for frames in self.enemy_frames.values())
         
     
-    def input(self):
-        keys = pygame.key.get_pressed()
-        if (int(keys[pygame.K_SPACE]) or pygame.mouse.get_pressed()[0]) and self.can_shoot:
-            self.shoot_sound.play()
+    def input(self, keys, mouse, now):
+        if (int(keys[pygame.K_SPACE]) or mouse[0]) and self.can_shoot:
+            self.play_effect(self.shoot_channels, self.shoot_sound)
             pos = self.gun.rect.center + self.gun.shooting_direction * 50
-            Bullet(self.bullet_surf, pos, self.gun.shooting_direction, (self.all_sprites, self.bullet_sprites)) 
+            Bullet(self.bullet_surf, self.bullet_mask, pos, self.gun.shooting_direction, (self.all_sprites, self.bullet_sprites))
             self.can_shoot = False
-            self.shoot_time = pygame.time.get_ticks()
+            self.shoot_time = now
+
+    def play_effect(self, channels, sound):
+        """Play sound on the next channel of its reserved round-robin pool."""
+        next(channels).play(sound)
 
-    def gun_timer(self):
+    def gun_timer(self, now):
         if not self.can_shoot:
-            current_time = pygame.time.get_ticks()
-            if current_time - self.shoot_time >= self.gun_cooldown:
+            if now - self.shoot_time >= self.gun_cooldown:
                 self.can_shoot = True
 
 
     def setup(self):
-        map = load_pygame(join('data', 'maps', 'world.tmx'))
-        for x, y, image in map.get_layer_by_name('Ground').tiles():
-            Sprite((x * TILE_SIZE, y * TILE_SIZE), image, self.all_sprites)
+        # bake the static ground layer into a single surface
+        ground_surf = pygame.Surface(self.map_dimensions).convert()
+        for x, y, image in self.tmx_map.get_layer_by_name('Ground').tiles():
+            ground_surf.blit(image, (x * TILE_SIZE, y * TILE_SIZE))
+        self.all_sprites.ground_surf = ground_surf
 
-        for obj in map.get_layer_by_name('Objects'):
+        for obj in self.tmx_map.get_layer_by_name('Objects'):
             CollisionSprite((obj.x, obj.y), obj.image, (self.all_sprites, self.collision_sprites))
 
-        for obj in map.get_layer_by_name('Collisions'):
+        for obj in self.tmx_map.get_layer_by_name('Collisions'):
             CollisionSprite((obj.x, obj.y), pygame.Surface((obj.width, obj.height)), self.collision_sprites)
 
-        for obj in map.get_layer_by_name('Entities'):
+        for obj in self.tmx_map.get_layer_by_name('Entities'):
             if obj.name == 'Player':
                 self.player = Player((obj.x, obj.y), self.all_sprites, self.collision_sprites)
                 self.gun = Gun(self.player, self.all_sprites)
             else:
                 self.spawn_positions.append((obj.x, obj.y))
+        self.spawn_positions = tuple(self.spawn_positions) # fixed after setup, only read by choice()
                     
     def bullet_collision(self):
-        if self.bullet_sprites:
-            for bullet in self.bullet_sprites:
-                collision_sprites = pygame.sprite.spritecollide(bullet, self.enemy_sprites, False, pygame.sprite.collide_mask)
-                if collision_sprites:
-                    self.impact_sound.play()
-                    for sprite in collision_sprites:
-                        sprite.destroy()
-                    bullet.kill()
+        if not self.bullet_sprites or not self.enemy_sprites:
+            return
+        # bullets stay the outer loop even when they outnumber enemies: each one is a
+        # cheap lookup into the enemy spatial hash, while swapping would scan all bullets per enemy
+        for bullet in self.bullet_sprites:
+            collision_sprites = self.collide_enemies(bullet)
+            if collision_sprites:
+                self.play_effect(self.impact_channels, self.impact_sound)
+                for sprite in collision_sprites:
+                    sprite.destroy()
+                bullet.kill()
     
+    def collide_enemies(self, sprite):
+        """Return the enemies overlapping sprite, testing masks only for nearby enemies whose rects overlap."""
+        return [enemy for enemy in self.enemy_sprites.nearby(sprite.rect)
+                if sprite.rect.colliderect(enemy.rect) and pygame.sprite.collide_mask(sprite, enemy)]
+
     def player_collision(self):
-        if pygame.sprite.spritecollide(self.player, self.enemy_sprites, False, pygame.sprite.collide_mask):
+        if self.collide_enemies(self.player):
             self.running = False
 
-    def calc_next_enemy_move(self, num_moves=50):
-        """Calculate the next `num_moves` moves for each enemy using the Gemini API."""
-        # Prepare data to send to Gemini
-        enemy_positions = [(enemy.rect.centerx, enemy.rect.centery) for enemy in self.enemy_sprites]
-
-        # Convert player's position to map-relative coordinates
-        camera_offset_x, camera_offset_y = self.get_camera_offset()
-        player_position = (
-            self.player.rect.centerx + camera_offset_x,
-            self.player.rect.centery + camera_offset_y
-        )
-
-        # Clamp player position to map boundaries
-        map_width, map_height = self.get_map_dimensions()
-        player_position = (
-            max(0, min(player_position[0], map_width - 1)),
-            max(0, min(player_position[1], map_height - 1))
-        )
+    def calc_next_enemy_move(self, enemy_positions, player_position, map_origin, map_layout, num_moves=50):
+        """Calculate the next `num_moves` moves for each enemy using the Gemini API.
 
-        # Send only a smaller region of the map around the player and enemies
-        map_layout = self.get_relevant_map_layout(player_position, radius=10)
+        Runs on a worker thread, so it only uses the snapshot taken by async_calc_next_enemy_moves
+        and never reads the live sprites.
+        """
+        map_rows = self.encode_map_layout(map_layout)
 
-        # Create the request payload
-        request_data = {
-            "enemy_positions": enemy_positions,
-            "player_position": player_position,
-            "map_layout": map_layout,
-            "num_moves": num_moves
-        }
+        # compact JSON for the prompt instead of Python reprs
+        enemy_positions_str = json.dumps(enemy_positions.tolist(), separators=(',', ':'))
+        player_position_str = json.dumps(player_position, separators=(',', ':'))
 
         # Call Gemini API
-        client = genai.Client(api_key=self.gemini_api_key)
         try:
-            response = client.models.generate_content(
+            response = self.gemini_client.models.generate_content(
                 model="gemini-2.0-flash",
-                contents=f"Given the following data:\n"
-                         f"Enemy positions: {enemy_positions}\n"
-                         f"Player position: {player_position}\n"
-                         f"Map layout: {map_layout}\n"
-                         f"Calculate the next {num_moves} optimal positions for the enemies to navigate toward the player while avoiding obstacles. "
-                         f"Return the result as a JSON list of lists where each sublist contains the next positions of all enemies.",
+                contents=ENEMY_MOVES_PROMPT.format(
+                    enemy_positions=enemy_positions_str,
+                    player_position=player_position_str,
+                    tile_size=TILE_SIZE,
+                    map_origin=map_origin,
+                    map_rows=map_rows,
+                    num_moves=num_moves,
+                ),
+                config=ENEMY_MOVES_CONFIG,
             )
-            # Clean the response
-            response_text = response.text.strip()
-            if response_text.startswith("```json"):
-                response_text = response_text[7:-3].strip()  # Remove ```json and trailing ```
-            
+            # Clean the response in case the model still wraps it in a code fence
+            response_text = response.text.strip().removeprefix("```json").removesuffix("```").strip()
+
             # Parse the response
-            next_moves = json.loads(response_text)  # Safely parse JSON response
+            next_moves = np.asarray(json_loads(response_text), dtype=np.int32)  # Safely parse JSON response
+            if next_moves.ndim != 3 or next_moves.shape[2] != 2:
+                raise ValueError(f"expected (enemies, moves, 2) positions, got shape {next_moves.shape}")
             return next_moves
         except json.JSONDecodeError:
             print("Invalid JSON response from Gemini API:", response.text)
@@ -181,93 +238,193 @@ class Game:
             print(f"Error calling Gemini API: {e}")
             return None
 
+    def get_player_map_position(self):
+        """Return the player's position in map coordinates, clamped to the map boundaries."""
+        # the player rect is already in world (map) coordinates; the camera offset only applies on screen
+        map_width, map_height = self.get_map_dimensions()
+        return (
+            max(0, min(self.player.rect.centerx, map_width - 1)),
+            max(0, min(self.player.rect.centery, map_height - 1))
+        )
+
+    def get_move_cache_key(self):
+        """Quantize the player and enemy positions into coarse cells for the move cache."""
+        cell = self.move_cache_cell
+        player_cell = (self.player.rect.centerx // cell, self.player.rect.centery // cell)
+        enemy_cells = tuple((enemy.rect.centerx // cell, enemy.rect.centery // cell) for enemy in self.enemy_sprites)
+        return player_cell, enemy_cells
+
+    def cache_enemy_moves(self, key, start_positions, moves):
+        """Store moves as offsets from each enemy's start so they can be replayed from other positions."""
+        count = min(len(start_positions), len(moves))
+        self.move_cache[key] = moves[:count] - start_positions[:count, None, :]
+        self.move_cache.move_to_end(key)
+        if len(self.move_cache) > self.move_cache_size:
+            self.move_cache.popitem(last=False)
+
     def async_calc_next_enemy_moves(self, num_moves=50):
-        """Fetch the next `num_moves` moves asynchronously."""
+        """Fetch the next `num_moves` moves asynchronously, reusing cached moves for the same region."""
+        if not self.enemy_sprites:
+            self.set_enemy_moves(np.empty((0, 0, 2), dtype=np.int32))  # nothing to move, don't spend an API call on it
+            return
+
+        key = self.get_move_cache_key()
+        if key in self.move_cache:
+            self.move_cache.move_to_end(key)
+            offsets = self.move_cache[key]
+            positions = self.get_enemy_positions()
+            count = min(len(positions), len(offsets))
+            self.set_enemy_moves(positions[:count, None, :] + offsets[:count])
+            return
+
+        # coalesce requests: while a fetch is in flight, later callers wait for its result
+        if self.pending_move_keys:
+            return
+        if self.now < self.api_retry_at or not self.reserve_api_call():
+            self.fallback_enemy_moves(num_moves)
+            return
+        self.pending_move_keys.add(key)
+        # snapshot everything the request needs here, so the worker never touches pygame state;
+        # the map window is a view into map_grid, which is never modified after startup
+        start_positions = self.get_enemy_positions()
+        player_position = self.get_player_map_position()
+        map_origin, map_layout = self.get_relevant_map_layout(player_position, radius=10)
+
         def fetch_moves():
-            new_moves = self.calc_next_enemy_move(num_moves)
-            if new_moves:
-                self.enemy_moves = new_moves
+            # only compute here; the game state is updated from run() on the main thread
+            new_moves = None
+            try:
+                if not self.stop_event.is_set():
+                    new_moves = self.calc_next_enemy_move(start_positions, player_position, map_origin, map_layout, num_moves)
+            finally:
+                self.pending_moves.put((key, start_positions, new_moves, num_moves))
+
+        self.api_pool.submit(fetch_moves)
+
+    def apply_pending_moves(self):
+        """Apply the results of finished move fetches; must run on the main thread."""
+        while True:
+            try:
+                key, start_positions, new_moves, num_moves = self.pending_moves.get_nowait()
+            except queue.Empty:
+                break
+            self.pending_move_keys.discard(key)
+            if new_moves is not None and new_moves.size:
+                self.api_failures = 0
+                self.cache_enemy_moves(key, start_positions, new_moves)
+                self.set_enemy_moves(new_moves)
             else:
+                self.api_retry_at = self.now + min(1000 * 2 ** self.api_failures, self.api_max_backoff)
+                self.api_failures += 1
                 print("API response delayed or invalid. Falling back to simple logic.")
                 self.fallback_enemy_moves(num_moves)
 
-        thread = threading.Thread(target=fetch_moves)
-        thread.start()
+    def reserve_api_call(self):
+        """Record an API call if the last minute has room for one; must run on the main thread."""
+        timestamps = self.api_call_timestamps
+        while timestamps and self.now - timestamps[0] >= 60000:
+            timestamps.popleft()
+        if len(timestamps) >= self.api_calls_per_minute:
+            return False
+        timestamps.append(self.now)
+        return True
+
+    def get_enemy_positions(self):
+        """Return the enemy centers as an (N, 2) int32 array, in enemy_sprites order."""
+        enemies = self.enemy_sprites.sprites()
+        return np.fromiter((value for enemy in enemies for value in enemy.rect.center),
+                           dtype=np.int32, count=2 * len(enemies)).reshape(-1, 2)
 
     def fallback_enemy_moves(self, num_moves):
         """Generate simple fallback moves for enemies."""
-        self.enemy_moves = []  # Reset enemy moves
-        for enemy in self.enemy_sprites:
-            moves = []
-            for _ in range(num_moves):
-                # Move enemy directly toward the player
-                dx = self.player.rect.centerx - enemy.rect.centerx
-                dy = self.player.rect.centery - enemy.rect.centery
-                step_x = dx // abs(dx) if dx != 0 else 0
-                step_y = dy // abs(dy) if dy != 0 else 0
-                moves.append((enemy.rect.centerx + step_x, enemy.rect.centery + step_y))
-            self.enemy_moves.append(moves)
+        if not self.enemy_sprites:
+            self.set_enemy_moves(np.empty((0, 0, 2), dtype=np.int32))
+            return
+
+        # Move every enemy directly toward the player, one pixel per axis per step
+        positions = self.get_enemy_positions()
+        target = np.array(self.player.rect.center, dtype=np.int32)
+        step = np.sign(target - positions).astype(np.int32)
+        offsets = np.arange(1, num_moves + 1, dtype=np.int32)
+        moves = positions[:, None, :] + step[:, None, :] * offsets[None, :, None]
+        self.set_enemy_moves(moves)
+
+    def set_enemy_moves(self, moves):
+        """Replace the move buffer with an (enemies, moves, 2) array and restart from its first step."""
+        self.enemy_moves = moves
+        self.enemy_move_step = 0
+
+    def step_enemy_moves(self):
+        """Move every live enemy to its next buffered position in one pass."""
+        positions = self.enemy_moves[:, self.enemy_move_step].tolist()
+        self.enemy_move_step += 1
+        for enemy, position in zip(self.enemy_sprites, positions):
+            if enemy.death_time == 0: # dying enemies stay where they were hit
+                enemy.rect.center = position
 
     def get_relevant_map_layout(self, player_position, radius):
-        """Generate a smaller map layout around the player."""
-        map_layout = self.get_map_layout()
-        relevant_layout = {}
-        px, py = player_position
-        for (x, y), value in map_layout.items():
-            if abs(x - px // TILE_SIZE) <= radius and abs(y - py // TILE_SIZE) <= radius:
-                relevant_layout[(x, y)] = value
-        return relevant_layout
-
-    def get_camera_offset(self):
-        """Calculate the camera's offset relative to the map."""
-        # camera centers on the player
-        camera_x = self.player.rect.centerx - (WINDOW_WIDTH // 2)
-        camera_y = self.player.rect.centery - (WINDOW_HEIGHT // 2)
-        return camera_x, camera_y
-
-    def get_map_layout(self):
-        """Generate a grid representation of the map."""
-        map_layout = {}
-        for x, y, _ in load_pygame(join('data', 'maps', 'world.tmx')).get_layer_by_name('Ground').tiles():
-            map_layout[(x, y)] = 0  # Walkable tile
-        for obj in load_pygame(join('data', 'maps', 'world.tmx')).get_layer_by_name('Collisions'):
-            grid_x, grid_y = int(obj.x // TILE_SIZE), int(obj.y // TILE_SIZE)
-            map_layout[(grid_x, grid_y)] = 1  # Obstacle
-        return map_layout
+        """Slice a smaller map layout around the player out of the map grid.
+
+        Returns the (x, y) tile of the window's top-left corner and the window itself.
+        """
+        px, py = int(player_position[0] // TILE_SIZE), int(player_position[1] // TILE_SIZE)
+        x0, y0 = max(0, px - radius), max(0, py - radius)
+        return (x0, y0), self.map_grid[y0:py + radius + 1, x0:px + radius + 1]
+
+    def encode_map_layout(self, map_layout):
+        """Encode a map window as rows of 0/1 characters, one byte per tile."""
+        return "\n".join("".join(map(str, row)) for row in map_layout.tolist())
+
+    def build_map_grid(self):
+        """Generate a grid representation of the map as a (height, width) uint8 array."""
+        map_grid = np.zeros((self.tmx_map.height, self.tmx_map.width), dtype=np.uint8)  # 0 = walkable tile
+        for obj in self.tmx_map.get_layer_by_name('Collisions'):
+            # mark every tile the collision rect covers, not just its top-left tile
+            x0, y0 = max(0, int(obj.x // TILE_SIZE)), max(0, int(obj.y // TILE_SIZE))
+            x1 = max(x0 + 1, ceil((obj.x + obj.width) / TILE_SIZE))
+            y1 = max(y0 + 1, ceil((obj.y + obj.height) / TILE_SIZE))
+            map_grid[y0:y1, x0:x1] = 1  # Obstacle
+        return map_grid
 
     def get_map_dimensions(self):
         """Get the dimensions of the map in pixels."""
-        map = load_pygame(join('data', 'maps', 'world.tmx'))
-        map_width = map.width * TILE_SIZE
-        map_height = map.height * TILE_SIZE
-        return map_width, map_height
+        return self.map_dimensions
 
     def run(self):
         while self.running:
             # dt
             dt = self.clock.tick() / 1000
+            # sample SDL state once per frame
+            self.now = pygame.time.get_ticks()
+            keys = pygame.key.get_pressed()
+            mouse = pygame.mouse.get_pressed()
 
             # event loop
+            enemy_spawns = 0
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
                     self.running = False
                 if event.type == self.enemy_event:
-                    Enemy(choice(self.spawn_positions), choice(list(self.enemy_frames.values())), (self.all_sprites, self.enemy_sprites), self.player, self.collision_sprites)
+                    enemy_spawns += 1
+
+            # spawn every queued enemy_event in one batch
+            for _ in range(enemy_spawns):
+                frames, masks = choice(self.enemy_animations)
+                Enemy(choice(self.spawn_positions), frames, masks, (self.all_sprites, self.enemy_sprites), self.player, self.collision_sprites)
 
             # Use precomputed moves or fetch new ones if needed
-            if not self.enemy_moves or len(self.enemy_moves[0]) == 0:
+            self.apply_pending_moves()
+            if self.enemy_move_step >= self.enemy_moves.shape[1]:
                 self.async_calc_next_enemy_moves(num_moves=50)
 
-            if self.enemy_moves:
-                for enemy, moves in zip(self.enemy_sprites, self.enemy_moves):
-                    if moves:
-                        next_pos = moves.pop(0)
-                        enemy.rect.center = next_pos
+            if self.enemy_move_step < self.enemy_moves.shape[1]:
+                self.step_enemy_moves()
 
             # update
-            self.gun_timer()
-            self.input()
+            self.gun_timer(self.now)
+            self.input(keys, mouse, self.now)
             self.all_sprites.update(dt)
+            self.enemy_sprites.rehash()
             self.bullet_collision()
             self.player_collision()
 
@@ -275,6 +432,8 @@ class Game:
             self.display_surface.fill('black')
             self.all_sprites.draw(self.player.rect.center)
             pygame.display.update()
+        self.stop_event.set()
+        self.api_pool.shutdown(wait=True, cancel_futures=True)
         pygame.quit()
 
 if __name__ == '__main__':
@@ -7,6 +7,7 @@ class Player(pygame.sprite.Sprite):
         self.state = 'down'
         self.frame_index = 0
         self.image = pygame.image.load(join('images', 'player', 'down', '0.png')).convert_alpha()
+        self.mask = pygame.mask.from_surface(self.image)
         self.rect = self.image.get_rect(center = pos)
         self.hitbox_rect = self.rect.inflate(-60, -90)
 
@@ -19,12 +20,10 @@ class Player(pygame.sprite.Sprite):
         self.frames = {'left': [], 'right': [], 'up': [], 'down': []}
 
         for state in self.frames.keys():
-            for folder_path, sub_folders, file_names in walk(join('images', 'player', state)):
-                if file_names:
-                    for file_name in sorted(file_names, key= lambda name: int(name.split('.')[0])):
-                        full_path = join(folder_path, file_name)
-                        surf = pygame.image.load(full_path).convert_alpha()
-                        self.frames[state].append(surf)
+            with scandir(join('images', 'player', state)) as files:
+                files = sorted((file for file in files if file.is_file()), key= lambda file: int(file.name.split('.', 1)[0]))
+            self.frames[state] = [pygame.image.load(file.path).convert_alpha() for file in files]
+        self.masks = {state: [pygame.mask.from_surface(surf) for surf in frames] for state, frames in self.frames.items()}
             
     
     def input(self):
@@ -61,7 +60,9 @@ class Player(pygame.sprite.Sprite):
         
         # animate
         self.frame_index = self.frame_index + 5 * dt if self.direction.magnitude() > 0 else 0
-        self.image = self.frames[self.state][int(self.frame_index) % len(self.frames[self.state])]
+        index = int(self.frame_index) % len(self.frames[self.state])
+        self.image = self.frames[self.state][index]
+        self.mask = self.masks[self.state][index]
 
 
     def update(self, dt):
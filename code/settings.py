@@ -1,6 +1,6 @@
 import pygame
 from os.path import join
-from os import walk
+from os import scandir
 
 WINDOW_WIDTH, WINDOW_HEIGHT = 1280, 720
 TILE_SIZE = 64
\ No newline at end of file
@@ -1,13 +1,6 @@
 from settings import *
 from math import atan2, degrees
 
-class Sprite(pygame.sprite.Sprite):
-    def __init__(self, pos, surf, groups):
-        super().__init__(groups)
-        self.image = surf
-        self.rect = self.image.get_rect(topleft = pos)
-        self.ground = True
-
 class CollisionSprite(pygame.sprite.Sprite):
     def __init__(self, pos, surf, groups):
         super().__init__(groups)
@@ -47,9 +40,10 @@ class Gun(pygame.sprite.Sprite):
 
 
 class Bullet(pygame.sprite.Sprite):
-    def __init__(self, surf, pos, direction, groups):
+    def __init__(self, surf, mask, pos, direction, groups):
         super().__init__(groups)
         self.image = surf
+        self.mask = mask
         self.rect = self.image.get_rect(center = pos)
         self.spawn_time = pygame.time.get_ticks()
         self.lifetime = 1000
@@ -63,13 +57,14 @@ class Bullet(pygame.sprite.Sprite):
             self.kill()
 
 class Enemy(pygame.sprite.Sprite):
-    def __init__(self, pos, frames, groups, player, collision_sprites):
+    def __init__(self, pos, frames, masks, groups, player, collision_sprites):
         super().__init__(groups)
         self.player = player
 
         # images
-        self.frames, self.frame_index = frames, 0
+        self.frames, self.masks, self.frame_index = frames, masks, 0
         self.image = self.frames[self.frame_index]
+        self.mask = self.masks[self.frame_index]
         self.animation_speed = 6
 
         # rect
@@ -85,7 +80,9 @@ class Enemy(pygame.sprite.Sprite):
 
     def animate(self, dt):
         self.frame_index += self.animation_speed * dt
-        self.image = self.frames[int(self.frame_index) % len(self.frames)]
+        index = int(self.frame_index) % len(self.frames)
+        self.image = self.frames[index]
+        self.mask = self.masks[index]
 
     def move(self, dt):
         # get direction
@@ -114,9 +111,10 @@ class Enemy(pygame.sprite.Sprite):
         # start a time
         self.death_time = pygame.time.get_ticks()
         # change the image
-        surf = pygame.mask.from_surface(self.frames[0]).to_surface()
+        surf = self.masks[0].to_surface()
         surf.set_colorkey('black')
         self.image = surf
+        self.mask = self.masks[0]
 
     def death_timer(self):
         if pygame.time.get_ticks() - self.death_time >= self.death_duration: